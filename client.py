@@ -2,8 +2,12 @@
 # To be run on the laptop
 # This client sends commands to the server and prints the response.
 
+import sys
 import socket
+import struct
+import asyncio
 import logging
+import threading
 import time
 from yamspy import MSPy
 
@@ -11,8 +15,22 @@ from yamspy import MSPy
 COMMAND_PORT = 65000  # The port must match the server's port
 SERIAL_PORT = "/dev/ttyACM0" 
 
+# --- Protocol (must match the server) ---
+# Each command is sent as a single opcode byte; each response arrives as a
+# little-endian uint16 length followed by that many bytes of UTF-8 text.
+OPCODES = {
+    'ping': 1,
+    'status': 2,
+    'bar': 3,
+    'arm': 4,
+    'disarm': 5,
+    'time': 6,
+}
+RESPONSE_HEADER = struct.Struct('<H')
+
 # --- Setup logging ---
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(process)d - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
 
 def get_barometer_reading():
     """
@@ -72,63 +90,131 @@ def get_barometer_reading():
     except Exception as e:
         print(f"\nAn error occurred: {e}")
 
-def main():
+def read_stdin_lines(loop, lines):
     """
-    Main function to connect to the server and send commands.
+    Feeds lines typed on the keyboard into the lines queue, then None at EOF.
+    Runs in a daemon thread so a pending read never keeps the process alive,
+    and stops once the session's event loop has closed.
     """
-    # Get the server's IP address from the user
-    pi_ip_address = input("Enter the Raspberry Pi's IP address: ").strip()
-    if not pi_ip_address:
-        logging.error("No IP address entered. Exiting.")
+    try:
+        for line in sys.stdin:
+            loop.call_soon_threadsafe(lines.put_nowait, line)
+        loop.call_soon_threadsafe(lines.put_nowait, None)
+    except RuntimeError:
+        # The event loop is closed; nobody is waiting for more commands
         return
 
-    # Create a new socket object
-    client_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
 
+async def send_commands(writer):
+    """
+    Reads commands from the keyboard and sends them to the server.
+    Returns True if the user asked for barometer readings.
+    """
+    loop = asyncio.get_running_loop()
+    lines = asyncio.Queue()
+    threading.Thread(target=read_stdin_lines, args=(loop, lines), daemon=True).start()
     try:
-        # --- Connect to the server ---
-        logging.info(f"Attempting to connect to {pi_ip_address}:{COMMAND_PORT}...")
-        client_socket.connect((pi_ip_address, COMMAND_PORT))
-        logging.info("Successfully connected to the server.")
-
-        # --- Main command loop ---
-        while True:
+        while not writer.is_closing():
             # Get command from user input
-            command = input("\nEnter command (ping, status, time, bar, or 'exit' to quit): ").strip().lower()
+            print("\nEnter command (ping, status, time, bar, or 'exit' to quit): ", end='', flush=True)
+            command = await lines.get()
+            if command is None:
+                break
+            command = command.strip().lower()
 
             if not command:
                 continue
-            
+
             if command == 'bar':
-                get_barometer_reading()
-                break
-                
+                return True
+
             if command == 'exit':
-                logging.info("Exit command received. Closing connection.")
+                logger.info("Exit command received. Closing connection.")
+                break
+
+            opcode = OPCODES.get(command)
+            if opcode is None:
+                print("Error: Unknown command.")
+                continue
+
+            if writer.is_closing():
                 break
 
             # Send the command to the server
-            logging.info(f"Sending command: '{command}'")
-            client_socket.sendall(command.encode('utf-8'))
+            logger.info("Sending command: %r", command)
+            writer.write(bytes((opcode,)))
+            await writer.drain()
+        return False
+    finally:
+        # Tell the server we're done; it closes the connection once every
+        # command sent so far has been answered, which ends print_responses
+        if not writer.is_closing():
+            writer.write_eof()
 
-            # Wait to receive the response from the server (up to 1024 bytes)
-            response = client_socket.recv(1024)
-            
-            # Print the decoded response
-            print(f"Server response: {response.decode('utf-8')}")
+
+async def print_responses(reader):
+    """
+    Prints server responses as soon as they arrive.
+    """
+    while True:
+        # Wait for a complete length-prefixed response
+        try:
+            header = await reader.readexactly(RESPONSE_HEADER.size)
+            (length,) = RESPONSE_HEADER.unpack(header)
+            response = await reader.readexactly(length)
+        except asyncio.IncompleteReadError:
+            logger.info("Connection closed.")
+            break
+
+        # Print the decoded response
+        print(f"Server response: {response.decode('utf-8')}")
+
+
+async def run_client(pi_ip_address):
+    # --- Connect to the server ---
+    logger.info("Attempting to connect to %s:%s...", pi_ip_address, COMMAND_PORT)
+    reader, writer = await asyncio.open_connection(pi_ip_address, COMMAND_PORT)
+    logger.info("Successfully connected to the server.")
+
+    # Send each short command immediately instead of waiting on Nagle's algorithm
+    sock = writer.get_extra_info('socket')
+    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    # --- Main command loop ---
+    try:
+        want_barometer, _ = await asyncio.gather(send_commands(writer), print_responses(reader))
+    finally:
+        # --- Clean up the connection ---
+        logger.info("Closing socket.")
+        writer.close()
+    return want_barometer
+
+
+def main():
+    """
+    Main function to connect to the server and send commands.
+    """
+    # Get the server's IP address from the user
+    pi_ip_address = input("Enter the Raspberry Pi's IP address: ").strip()
+    if not pi_ip_address:
+        logger.error("No IP address entered. Exiting.")
+        return
+
+    try:
+        want_barometer = asyncio.run(run_client(pi_ip_address))
 
     except socket.gaierror:
         # This error occurs for invalid hostnames or IPs
-        logging.error(f"Hostname could not be resolved. Check the IP address: {pi_ip_address}")
+        logger.error("Hostname could not be resolved. Check the IP address: %s", pi_ip_address)
     except socket.error as e:
         # This catches other connection errors (e.g., connection refused)
-        logging.error(f"Failed to connect or communicate with server: {e}")
+        logger.error("Failed to connect or communicate with server: %s", e)
     except KeyboardInterrupt:
-        logging.info("\nClient is shutting down due to user interrupt (Ctrl+C).")
-    finally:
-        # --- Clean up the connection ---
-        logging.info("Closing socket.")
-        client_socket.close()
+        logger.info("\nClient is shutting down due to user interrupt (Ctrl+C).")
+    else:
+        # Reads the FC directly until Ctrl+C, so it runs outside the event loop
+        if want_barometer:
+            get_barometer_reading()
 
 if __name__ == "__main__":
     main()
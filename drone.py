@@ -16,8 +16,9 @@ __email__ = "ricardo.azambuja@gmail.com"
 __status__ = "Development"
 
 import time
+import heapq
 import curses
-from itertools import cycle
+import ctypes
 
 from yamspy import MSPy
 
@@ -25,9 +26,37 @@ from yamspy import MSPy
 CTRL_LOOP_TIME = 1/100  # 100Hz loop for sending RC commands
 SLOW_MSGS_LOOP_TIME = 1/5 # 5Hz loop for requesting other data
 
+# Labels of the monitoring lines
+STATUS_LABEL = "Status: "
+ATTITUDE_LABEL = "Attitude: "
+ALTITUDE_LABEL = "Altitude: "
+ARMED_LABEL = "ARMED: "
+VOLTAGE_LABEL = "Voltage: "
+
 # Serial port configuration
 SERIAL_PORT = "/dev/ttyACM0"
 
+def msp_build(code, payload=b""):
+    """Serializes an MSP v1 request: '$M<' + size + code + payload + XOR checksum."""
+    checksum = len(payload) ^ code
+    for byte in payload:
+        checksum ^= byte
+    return b"$M<" + bytes((len(payload), code)) + bytes(payload) + bytes((checksum,))
+
+# Slow-loop requests never change, so their frames are serialized once instead
+# of by YAMSPy's send_RAW_msg on every tick
+FRAMES = {
+    msg: msp_build(MSPy.MSPCodes[msg])
+    for msg in ['MSP_STATUS_EX', 'MSP_ATTITUDE', 'MSP_ALTITUDE', 'MSP_ANALOG']
+}
+
+def send_frame(board, frame):
+    """Writes a prebuilt frame to the board, bypassing YAMSPy's framing."""
+    with board.serial_port_write_lock:
+        # pyserial retries short writes and EAGAIN on its non-blocking fd
+        # until the write timeout, so a frame never goes out half-written
+        board.conn.write(frame)
+
 def run_curses(external_function):
     """Wrapper function to handle curses setup and teardown."""
     result = 1
@@ -55,18 +84,22 @@ def run_curses(external_function):
 
 def keyboard_controller(screen):
     """Main function to handle flight controller communication and keyboard input."""
-    # Default command values
-    CMDS = {
-        'roll':     1500,
-        'pitch':    1500,
-        'throttle': 900,
-        'yaw':      1500,
-        'aux1':     1000, # Disarmed
-        'aux2':     1000  # Angle Mode
-    }
-
     # This order must match your flight controller's channel map (e.g., AETR)
     CMDS_ORDER = ['roll', 'pitch', 'throttle', 'yaw', 'aux1', 'aux2']
+    ROLL, PITCH, THROTTLE, YAW, AUX1, AUX2 = range(len(CMDS_ORDER))
+
+    # Default command values, in CMDS_ORDER. Updated in place and sent as the raw
+    # uint16 bytes MSP expects (native order, little-endian on the Pi), so no
+    # list is built per RC frame.
+    CMDS = (ctypes.c_uint16 * len(CMDS_ORDER))(
+        1500,  # roll
+        1500,  # pitch
+        900,   # throttle
+        1500,  # yaw
+        1000,  # aux1: Disarmed
+        1000,  # aux2: Angle Mode
+    )
+    CMDS_PAYLOAD = memoryview(CMDS).cast('B')
 
     try:
         screen.addstr(3, 0, "Connecting to the FC...")
@@ -77,16 +110,73 @@ def keyboard_controller(screen):
             screen.addstr(3, 0, "Connecting to the FC... connected!")
             screen.clrtoeol()
 
-            # Cycle through a list of slow messages to request periodically
-            slow_msgs = cycle(['MSP_STATUS_EX', 'MSP_ATTITUDE', 'MSP_ALTITUDE', 'MSP_ANALOG'])
-            
-            last_loop_time = time.time()
-            last_slow_msg_time = time.time()
+            # Slow messages requested together on every slow tick; responses are
+            # matched back to their request by MSP code
+            slow_msgs = ['MSP_STATUS_EX', 'MSP_ATTITUDE', 'MSP_ALTITUDE', 'MSP_ANALOG']
+            slow_msg_by_code = {MSPy.MSPCodes[msg]: msg for msg in slow_msgs}
+
+            # Static labels are drawn once; the slow loop only rewrites the values after them
+            screen.addstr(3, 0, STATUS_LABEL)
+            screen.addstr(5, 0, ATTITUDE_LABEL)
+            screen.addstr(6, 0, ALTITUDE_LABEL)
+            screen.addstr(7, 0, ARMED_LABEL)
+            screen.addstr(8, 0, VOLTAGE_LABEL)
+
+            def send_rc():
+                """Fast task for sending important commands (e.g., RC channels)."""
+                if board.send_RAW_msg(MSPy.MSPCodes['MSP_SET_RAW_RC'], CMDS_PAYLOAD):
+                    dataHandler = board.receive_msg()
+                    board.process_recv_data(dataHandler)
+
+            def slow_tick():
+                """Slow task for requesting less critical data for monitoring."""
+                # Queue all requests back-to-back, then drain the responses,
+                # instead of a full write/wait/read round trip per message
+                for msg in slow_msgs:
+                    send_frame(board, FRAMES[msg])
+
+                screen.addstr(3, len(STATUS_LABEL), cursor_msg)
+                screen.clrtoeol()
+
+                for _ in slow_msgs:
+                    dataHandler = board.receive_msg()
+                    board.process_recv_data(dataHandler)
+                    msg = slow_msg_by_code.get(dataHandler['code'])
+
+                    if msg == 'MSP_ATTITUDE':
+                        screen.addstr(5, len(ATTITUDE_LABEL), f"{board.SENSOR_DATA['kinematics']}")
+                        screen.clrtoeol()
+                    
+                    elif msg == 'MSP_ALTITUDE':
+                        screen.addstr(6, len(ALTITUDE_LABEL), f"{board.SENSOR_DATA['altitude']}")
+                        screen.clrtoeol()
+
+                    elif msg == 'MSP_STATUS_EX':
+                        is_armed = board.bit_check(board.CONFIG['mode'], 0)
+                        screen.addstr(7, len(ARMED_LABEL), f"{is_armed}, Flight Mode: {board.process_mode(board.CONFIG['mode'])}")
+                        screen.clrtoeol()
+                    
+                    elif msg == 'MSP_ANALOG':
+                        screen.addstr(8, len(VOLTAGE_LABEL), f"{board.ANALOG.get('voltage', 'N/A')}V")
+                        screen.clrtoeol()
+
+                # Push all of this tick's line updates to the terminal in one go
+                screen.noutrefresh()
+                curses.doupdate()
+
+            # Periodic tasks as a heap of (deadline, task_id, period, callback), ordered
+            # by deadline on the monotonic clock so wall-clock (NTP) jumps can't skew
+            # the loop. task_id breaks ties between equal deadlines. New periodic
+            # tasks only need an entry here.
+            now = time.monotonic()
+            tasks = [
+                (now, 0, CTRL_LOOP_TIME, send_rc),
+                (now, 1, SLOW_MSGS_LOOP_TIME, slow_tick),
+            ]
+            heapq.heapify(tasks)
             
             cursor_msg = "Starting main loop..."
             while True:
-                current_time = time.time()
-
                 char = screen.getch() # get keypress
                 curses.flushinp() # flushes buffer
 
@@ -95,70 +185,41 @@ def keyboard_controller(screen):
                     break
                 elif char == ord('a') or char == ord('A'):
                     cursor_msg = "ARMing command sent."
-                    CMDS['aux1'] = 1800
+                    CMDS[AUX1] = 1800
                 elif char == ord('d') or char == ord('D'):
                     cursor_msg = "DISarm command sent."
-                    CMDS['aux1'] = 1000
+                    CMDS[AUX1] = 1000
                 elif char == ord('w') or char == ord('W'):
-                    CMDS['throttle'] = min(2000, CMDS['throttle'] + 10)
-                    cursor_msg = f"Throttle: {CMDS['throttle']}"
+                    CMDS[THROTTLE] = min(2000, CMDS[THROTTLE] + 10)
+                    cursor_msg = f"Throttle: {CMDS[THROTTLE]}"
                 elif char == ord('e') or char == ord('E'):
-                    CMDS['throttle'] = max(900, CMDS['throttle'] - 10)
-                    cursor_msg = f"Throttle: {CMDS['throttle']}"
+                    CMDS[THROTTLE] = max(900, CMDS[THROTTLE] - 10)
+                    cursor_msg = f"Throttle: {CMDS[THROTTLE]}"
                 elif char == curses.KEY_RIGHT:
-                    CMDS['roll'] = min(2000, CMDS['roll'] + 10)
-                    cursor_msg = f"Roll: {CMDS['roll']}"
+                    CMDS[ROLL] = min(2000, CMDS[ROLL] + 10)
+                    cursor_msg = f"Roll: {CMDS[ROLL]}"
                 elif char == curses.KEY_LEFT:
-                    CMDS['roll'] = max(1000, CMDS['roll'] - 10)
-                    cursor_msg = f"Roll: {CMDS['roll']}"
+                    CMDS[ROLL] = max(1000, CMDS[ROLL] - 10)
+                    cursor_msg = f"Roll: {CMDS[ROLL]}"
                 elif char == curses.KEY_UP:
-                    CMDS['pitch'] = min(2000, CMDS['pitch'] + 10)
-                    cursor_msg = f"Pitch: {CMDS['pitch']}"
+                    CMDS[PITCH] = min(2000, CMDS[PITCH] + 10)
+                    cursor_msg = f"Pitch: {CMDS[PITCH]}"
                 elif char == curses.KEY_DOWN:
-                    CMDS['pitch'] = max(1000, CMDS['pitch'] - 10)
-                    cursor_msg = f"Pitch: {CMDS['pitch']}"
-
-
-                # Fast loop for sending important commands (e.g., RC channels)
-                if (current_time - last_loop_time) >= CTRL_LOOP_TIME:
-                    last_loop_time = current_time
-                    # Send the RC channel values to the FC
-                    if board.send_RAW_RC([CMDS[key] for key in CMDS_ORDER]):
-                        dataHandler = board.receive_msg()
-                        board.process_recv_data(dataHandler)
-
-                # Slow loop for requesting less critical data for monitoring
-                if (current_time - last_slow_msg_time) >= SLOW_MSGS_LOOP_TIME:
-                    last_slow_msg_time = current_time
-                    next_msg = next(slow_msgs)
-
-                    # Request and process the next message in the cycle
-                    if board.send_RAW_msg(MSPy.MSPCodes[next_msg], data=[]):
-                        dataHandler = board.receive_msg()
-                        board.process_recv_data(dataHandler)
-                        
-                        screen.addstr(3, 0, f"Status: {cursor_msg}")
-                        screen.clrtoeol()
-
-                        if next_msg == 'MSP_ATTITUDE':
-                            screen.addstr(5, 0, f"Attitude: {board.SENSOR_DATA['kinematics']}")
-                            screen.clrtoeol()
-                        
-                        elif next_msg == 'MSP_ALTITUDE':
-                            screen.addstr(6, 0, f"Altitude: {board.SENSOR_DATA['altitude']}")
-                            screen.clrtoeol()
-
-                        elif next_msg == 'MSP_STATUS_EX':
-                            is_armed = board.bit_check(board.CONFIG['mode'], 0)
-                            screen.addstr(7, 0, f"ARMED: {is_armed}, Flight Mode: {board.process_mode(board.CONFIG['mode'])}")
-                            screen.clrtoeol()
-                        
-                        elif next_msg == 'MSP_ANALOG':
-                            screen.addstr(8, 0, f"Voltage: {board.ANALOG.get('voltage', 'N/A')}V")
-                            screen.clrtoeol()
-                
-                # Small delay to prevent busy-waiting and reduce CPU usage
-                time.sleep(CTRL_LOOP_TIME - (time.time() - current_time)) if (time.time() - current_time) < CTRL_LOOP_TIME else time.sleep(0.001)
+                    CMDS[PITCH] = max(1000, CMDS[PITCH] - 10)
+                    cursor_msg = f"Pitch: {CMDS[PITCH]}"
+
+                # Sleep exactly until the earliest task is due, then run it
+                deadline, task_id, period, callback = tasks[0]
+                slack = deadline - time.monotonic()
+                if slack > 0:
+                    time.sleep(slack)
+                callback()
+
+                next_deadline = deadline + period
+                if next_deadline < time.monotonic():
+                    # Fell behind; restart this task's schedule instead of bursting to catch up
+                    next_deadline = time.monotonic() + period
+                heapq.heapreplace(tasks, (next_deadline, task_id, period, callback))
 
     except Exception as e:
         # In curses, exceptions don't print well. Write to a file for debugging.
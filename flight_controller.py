@@ -1,8 +1,38 @@
 import numpy as np
 import numpy.typing as npt
 import time
-from pid_controller import PIDController
 
+try:
+    from numba import njit
+except ImportError:
+    # Numba is optional; without it the same functions run as plain NumPy
+    def njit(*args, **kwargs):
+        def decorator(func):
+            return func
+        return decorator
+
+
+@njit(cache=True, fastmath=True)
+def _pid_step(Kp, Ki, Kd, integ, prev_err, setpoints, current, dt):
+    """One PID update for all axes at once. Returns (out, new_integ, new_prev_err)."""
+    errors = setpoints - current
+    new_integ = integ + errors * dt
+    if dt > 0:
+        deriv = (errors - prev_err) / dt
+    else:
+        deriv = np.zeros_like(errors)
+    out = Kp * errors + Ki * new_integ + Kd * deriv
+    return out, new_integ, errors
+
+
+@njit(cache=True, fastmath=True)
+def _to_rc(out, rc_center, rc_f, rc_i):
+    """Maps PID outputs to the [1000, 2000] RC command range, writing into rc_f/rc_i."""
+    np.multiply(out, 500, rc_f)
+    np.add(rc_f, rc_center, rc_f)
+    np.maximum(rc_f, 1000, rc_f)
+    np.minimum(rc_f, 2000, rc_f)
+    rc_i[:] = rc_f
 
 
 class FlightController:
@@ -13,54 +43,57 @@ class FlightController:
     This version is fully self-contained and calculates all necessary rates internally.
     """
     def __init__(self):
-        # --- PID Controllers for each axis ---
-        self.throttle_pid = PIDController(Kp=15, Ki=0, Kd=5)
-        self.roll_pid = PIDController(Kp=0.5, Ki=0.0, Kd=0.2)
-        self.pitch_pid = PIDController(Kp=0.5, Ki=0.0, Kd=0.2)
-        self.yaw_pid = PIDController(Kp=1.5, Ki=0.0, Kd=1)
+        # --- PID gains for each axis, in [throttle, roll, pitch, yaw] order ---
+        self.Kp = np.array([15, 0.5, 0.5, 1.5])
+        self.Ki = np.array([0, 0.0, 0.0, 0.0])
+        self.Kd = np.array([5, 0.2, 0.2, 1])
         self.ff_throttle = 1260
-        
+
+        # RC value each axis is centered on; throttle sits at the feed-forward hover point
+        self.rc_center = np.array([self.ff_throttle, 1500, 1500, 1500], dtype=np.float64)
+
+        # Scratch buffers reused on every control tick
+        self._setpoints = np.empty(4)
+        self._current = np.empty(4)
+        self._rc_f = np.empty(4)
+        self._rc_i = np.empty(4, dtype=np.int16)
+
         self.reset()
 
     def reset(self):
         """Resets all PID controllers and state variables."""
-        self.throttle_pid.reset()
-        self.roll_pid.reset()
-        self.pitch_pid.reset()
-        self.yaw_pid.reset()
-    
+        self.integ = np.zeros(4)
+        self.prev_err = np.zeros(4)
+
+    def update_gains(self, Kp, Ki, Kd):
+        """Allows for real-time updating of PID gains, each given in [throttle, roll, pitch, yaw] order."""
+        self.Kp[:] = Kp
+        self.Ki[:] = Ki
+        self.Kd[:] = Kd
+
     def compute_rc_commands(self, high_level_action: np.ndarray, state_goal: np.ndarray, dt: float) -> np.ndarray:
         """
         Converts the RL agent's high-level desires into low-level RC commands.
+        All four PID loops are evaluated at once on [throttle, roll, pitch, yaw] arrays.
+
+        The returned array is reused by the next call; copy it if it must be kept
+        across control ticks.
         """
-        current_alt_norm, current_roll_norm, current_pitch_norm, current_yaw_norm, _ = state_goal
-        desired_alt_norm, desired_roll_norm, desired_pitch_norm, desired_yaw_norm = high_level_action
-        
-        self.throttle_pid.setpoint = desired_alt_norm
-        throttle_command = self.throttle_pid.compute(current_alt_norm, dt)
-        
-        self.roll_pid.setpoint = desired_roll_norm
-        roll_command = self.roll_pid.compute(current_roll_norm, dt)
-        
-        self.pitch_pid.setpoint = desired_pitch_norm
-        pitch_command = self.pitch_pid.compute(current_pitch_norm, dt)
-        
-        clockwise_yaw_distance = abs(desired_yaw_norm - current_yaw_norm)
-        counterclockwise_yaw_distance = abs((desired_yaw_norm - 1) - current_yaw_norm)
-        
-        if clockwise_yaw_distance < counterclockwise_yaw_distance:
-            self.yaw_pid.setpoint = desired_yaw_norm
-        else:
-            self.yaw_pid.setpoint = desired_yaw_norm - 1
-        yaw_command = self.yaw_pid.compute(current_yaw_norm, dt)
-        
-        # --- Convert to [1000, 2000] RC Command Range ---
-        rc_throttle = 1260 + 500 * throttle_command
-        rc_roll = 1500 + 500 * roll_command
-        rc_pitch = 1500 + 500 * pitch_command
-        rc_yaw = 1500 + 500 * yaw_command
+        current = self._current
+        current[:] = state_goal[:4]
+        setpoints = self._setpoints
+        setpoints[:] = high_level_action
 
-        rc_commands = np.clip([rc_throttle, rc_roll, rc_pitch, rc_yaw], 1000, 2000)
+        # Steer yaw towards whichever side of the wraparound is closer. Shifting the
+        # desired yaw by whole turns so the yaw error lands in [-0.5, 0.5) does this
+        # without a data-dependent branch.
+        yaw_error = setpoints[3] - current[3]
+        setpoints[3] -= np.floor(yaw_error + 0.5)
 
-        return rc_commands.astype(int)
+        out, self.integ, self.prev_err = _pid_step(
+            self.Kp, self.Ki, self.Kd, self.integ, self.prev_err, setpoints, current, float(dt)
+        )
 
+        # --- Convert to [1000, 2000] RC Command Range ---
+        _to_rc(out, self.rc_center, self._rc_f, self._rc_i)
+        return self._rc_i
@@ -1,17 +1,88 @@
+import os
 import numpy as np
-import tflite_runtime.interpreter as tflite
 
-interpreter = tflite.Interpreter(model_path="master-model.tflite")
-interpreter.allocate_tensors()
-input_details = interpreter.get_input_details()
-output_details = interpreter.get_output_details()
+MODEL_PATH = "master-model.tflite"
+# Full-integer model produced by quantize_model.py; preferred when present
+INT8_MODEL_PATH = "master-model-int8.tflite"
+NUM_THREADS = 4  # The Pi 4 has 4 cores for the XNNPACK CPU kernels
 
+# Loaded on the first infer() call and reused afterwards
+_I = None
+_IN_DETAILS = None
+_OUT_DETAILS = None
+# Accessors returning NumPy views straight into the interpreter's tensor buffers.
+# The views themselves must not outlive a call: invoke() refuses to run while
+# any view into its buffers is still referenced.
+_in_tensor = None
+_out_tensor = None
+# Default destination for infer() results, reused on every call
+_OUT_BUF = None
+# Float scratch the input is quantized in before it is written to an integer tensor
+_IN_SCRATCH = None
 
-input_data = np.array([0.1, 0.65], dtype=np.float32)
-interpreter.set_tensor(input_details[0]['index'], input_data)
-interpreter.invoke()
 
+def _load_input(buf, x, details, scratch):
+    """Writes x into the input buffer in place, quantizing for integer tensors."""
+    scale, zero_point = details['quantization']
+    if not scale:
+        buf[:] = x
+        return
+    info = np.iinfo(buf.dtype)
+    np.divide(x, scale, out=scratch)
+    scratch += zero_point
+    np.rint(scratch, out=scratch)
+    np.clip(scratch, info.min, info.max, out=scratch)
+    buf[:] = scratch
 
-output_data = interpreter.get_tensor(output_details[0]['index'])
-print(output_data)
-print("ready")
\ No newline at end of file
+
+def _read_output(buf, out, details):
+    """Copies the output buffer into out, dequantizing integer tensors."""
+    scale, zero_point = details['quantization']
+    if not scale:
+        out[:] = buf
+        return
+    np.subtract(buf, zero_point, out=out, dtype=np.float32)
+    out *= scale
+
+
+def _load_interpreter():
+    global _I, _IN_DETAILS, _OUT_DETAILS, _in_tensor, _out_tensor, _OUT_BUF, _IN_SCRATCH
+    import tflite_runtime.interpreter as tflite
+
+    model_path = INT8_MODEL_PATH if os.path.exists(INT8_MODEL_PATH) else MODEL_PATH
+    # tflite-runtime applies the XNNPACK delegate by default; it handles both
+    # the float and the int8 model, so it only needs the thread count
+    _I = tflite.Interpreter(model_path=model_path, num_threads=NUM_THREADS)
+    _I.allocate_tensors()
+    _IN_DETAILS = _I.get_input_details()[0]
+    _OUT_DETAILS = _I.get_output_details()[0]
+    _in_tensor = _I.tensor(_IN_DETAILS['index'])
+    _out_tensor = _I.tensor(_OUT_DETAILS['index'])
+    _OUT_BUF = np.empty(_OUT_DETAILS['shape'], dtype=np.float32)
+    _IN_SCRATCH = np.empty(_IN_DETAILS['shape'], dtype=np.float32)
+
+
+def infer(x, out=None):
+    """
+    Runs the model on x. The interpreter is imported and built only on first use.
+
+    Inputs are written directly into the interpreter's input tensor and results
+    land in out, so no arrays are allocated per call as long as x is a NumPy
+    array; a list is converted to a temporary array first. When out is not given
+    a shared buffer is returned, which the next call overwrites; copy it to keep it.
+    """
+    if _I is None:
+        _load_interpreter()
+    if out is None:
+        out = _OUT_BUF
+
+    _load_input(_in_tensor(), x, _IN_DETAILS, _IN_SCRATCH)
+    _I.invoke()
+    _read_output(_out_tensor(), out, _OUT_DETAILS)
+    return out
+
+
+if __name__ == "__main__":
+    output_data = infer([0.1, 0.65])
+    print(output_data)
+    print("ready")
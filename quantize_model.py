@@ -0,0 +1,44 @@
+"""quantize_model.py: Offline full-integer (int8) quantization of the master model.
+
+Run this on the training machine (it needs the full `tensorflow` package, not
+tflite-runtime) against the SavedModel that master-model.tflite was exported
+from. The resulting master-model-int8.tflite is picked up automatically by
+inference-example.py when it sits next to it on the Pi.
+"""
+
+import sys
+import numpy as np
+import tensorflow as tf
+
+SAVED_MODEL_DIR = "master-model"  # SavedModel the float .tflite was exported from
+OUTPUT_PATH = "master-model-int8.tflite"
+NUM_CALIBRATION_SAMPLES = 500
+
+
+def representative_dataset():
+    """
+    Calibration inputs covering the normalized [init_height, height] range the
+    model sees in flight (both in [0, 1], rounded to 2 decimals like simpleUI.py).
+    """
+    rng = np.random.default_rng(0)
+    for _ in range(NUM_CALIBRATION_SAMPLES):
+        sample = np.round(rng.uniform(0.0, 1.0, size=2), 2).astype(np.float32)
+        yield [sample]
+
+
+def main(saved_model_dir=SAVED_MODEL_DIR, output_path=OUTPUT_PATH):
+    converter = tf.lite.TFLiteConverter.from_saved_model(saved_model_dir)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    converter.representative_dataset = representative_dataset
+    converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+    converter.inference_input_type = tf.int8
+    converter.inference_output_type = tf.int8
+
+    tflite_model = converter.convert()
+    with open(output_path, "wb") as f:
+        f.write(tflite_model)
+    print(f"Saved {output_path} ({len(tflite_model)} bytes)")
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:])
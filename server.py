@@ -1,18 +1,52 @@
 # simple_pi_server.py
 # To be run on the Raspberry Pi
-# This server listens for simple text commands and sends back a response.
+# This server listens for simple one-byte commands and sends back a response.
 
+import os
+import sys
+import time
+import signal
 import socket
+import selectors
+import array
+import ctypes
+import struct
+import functools
+import operator
+import argparse
+import contextlib
 import logging
+import multiprocessing
 from datetime import datetime
-import time
 from yamspy import MSPy
 
 # --- Configuration ---
 HOST_IP = "0.0.0.0"  # Listen on all available network interfaces
 COMMAND_PORT = 65000  # The port to listen on
 SERIAL_PORT = "/dev/ttyACM0"
-
+HEARTBEAT_RATE_HZ = 50  # RC resend rate that keeps the FC out of failsafe
+NOTSENT_LOWAT_BYTES = 16384  # Max queued-but-unsent bytes per client socket
+MAX_WORKERS = 4  # One worker process per Pi core at most
+SHUTDOWN_POLL_INTERVAL = 0.5  # Seconds between checks for a shutdown request
+RECV_BUFFER_SIZE = 1024  # Bytes read from a client at once
+FC_PROXY_TIMEOUT = 5.0  # Seconds a worker waits on worker 0 before giving up
+
+# --- Protocol ---
+# Each request is a single opcode byte. Each response is a little-endian uint16
+# length followed by that many bytes of UTF-8 text, so TCP may split or merge
+# messages freely without confusing either side.
+OP_PING = 1
+OP_STATUS = 2
+OP_BAR = 3
+OP_ARM = 4
+OP_DISARM = 5
+OP_TIME = 6
+RESPONSE_HEADER = struct.Struct("<H")
+
+# Linux-only option; the constant is missing from older Python builds
+TCP_NOTSENT_LOWAT = getattr(socket, "TCP_NOTSENT_LOWAT", 25)
+
+# Initial RC channel values
 rc_channels = {
     "roll": 1500,
     "pitch": 1500,
@@ -26,177 +60,354 @@ rc_channels = {
 
 rc_channel_order = ["roll", "pitch", "throttle", "yaw", "aux1", "aux2", "aux3", "aux4"]
 
+# Position of each channel in RC_BUF
+CH_IDX = {name: i for i, name in enumerate(rc_channel_order)}
+
+# RC values in rc_channel_order, updated in place
+RC_BUF = array.array("H", [rc_channels[channel] for channel in rc_channel_order])
+
+# Packs RC_BUF into the little-endian MSP_SET_RAW_RC payload
+RC_STRUCT = struct.Struct(f"<{len(rc_channel_order)}H")
+
+
+# --- MSP framing ---
+# YAMSPy rebuilds the header and checksum of every request in send_RAW_msg.
+# Requests that never change are serialized once and written straight to the
+# serial port.
+def msp_build(code, payload=b""):
+    """Serializes an MSP v1 request: '$M<' + size + code + payload + XOR checksum."""
+    checksum = len(payload) ^ code
+    for byte in payload:
+        checksum ^= byte
+    return b"$M<" + bytes((len(payload), code)) + bytes(payload) + bytes((checksum,))
+
+
+MSP_ALTITUDE_FRAME = msp_build(MSPy.MSPCodes["MSP_ALTITUDE"])
+
+# MSP_SET_RAW_RC frame rewritten in place on every heartbeat: the header is
+# built once, only the channel values and the checksum byte change
+RC_FRAME = bytearray(msp_build(MSPy.MSPCodes["MSP_SET_RAW_RC"], bytes(RC_STRUCT.size)))
+RC_PAYLOAD_OFFSET = 5
+RC_PAYLOAD = memoryview(RC_FRAME)[RC_PAYLOAD_OFFSET:-1]
+# Checksum of the size and code bytes, which never change
+RC_HEADER_CHECKSUM = RC_FRAME[3] ^ RC_FRAME[4]
+
+
+def send_frame(board, frame):
+    """Writes a prebuilt frame to the board, bypassing YAMSPy's framing."""
+    with board.serial_port_write_lock:
+        # pyserial retries short writes and EAGAIN on its non-blocking fd
+        # until the write timeout, so a frame never goes out half-written
+        board.conn.write(frame)
+
+
+def send_rc_frame(board):
+    """
+    Packs RC_BUF into RC_FRAME, sends it and consumes the FC's empty reply,
+    like YAMSPy's fast_msp_rc_cmd but without building a new frame.
+    """
+    RC_STRUCT.pack_into(RC_FRAME, RC_PAYLOAD_OFFSET, *RC_BUF)
+    RC_FRAME[-1] = functools.reduce(operator.xor, RC_PAYLOAD, RC_HEADER_CHECKSUM)
+    send_frame(board, RC_FRAME)
+    board.receive_raw_msg(size=6)
+
 
 # --- Setup logging ---
 logging.basicConfig(
-    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+    level=logging.INFO,
+    format="%(asctime)s - %(process)d - %(levelname)s - %(message)s",
 )
+logger = logging.getLogger(__name__)
+
+
+class _Timespec(ctypes.Structure):
+    _fields_ = [("tv_sec", ctypes.c_long), ("tv_nsec", ctypes.c_long)]
 
 
-def get_barometer_reading():
+class _Itimerspec(ctypes.Structure):
+    _fields_ = [("it_interval", _Timespec), ("it_value", _Timespec)]
+
+
+def create_timerfd(interval):
     """
-    Connects to the flight controller and retrieves barometer/altitude data.
+    Returns a non-blocking Linux timerfd that becomes readable every `interval`
+    seconds, so periodic work can be driven from the selector loop.
     """
-    print(f"Connecting to FC on {SERIAL_PORT}...")
+    if hasattr(os, "timerfd_create"):
+        # Python 3.13+
+        fd = os.timerfd_create(
+            time.CLOCK_MONOTONIC, flags=os.TFD_NONBLOCK | os.TFD_CLOEXEC
+        )
+        os.timerfd_settime(fd, initial=interval, interval=interval)
+        return fd
+
+    libc = ctypes.CDLL(None, use_errno=True)
+    # TFD_NONBLOCK and TFD_CLOEXEC share their values with O_NONBLOCK/O_CLOEXEC
+    fd = libc.timerfd_create(time.CLOCK_MONOTONIC, os.O_NONBLOCK | os.O_CLOEXEC)
+    if fd < 0:
+        errno = ctypes.get_errno()
+        raise OSError(errno, os.strerror(errno))
+
+    sec, nsec = divmod(round(interval * 1_000_000_000), 1_000_000_000)
+    spec = _Itimerspec(_Timespec(sec, nsec), _Timespec(sec, nsec))
+    if libc.timerfd_settime(fd, 0, ctypes.byref(spec), None) < 0:
+        errno = ctypes.get_errno()
+        os.close(fd)
+        raise OSError(errno, os.strerror(errno))
+    return fd
+
+
+class FCSession:
+    """
+    Keeps a single MSP connection to the flight controller open for the whole
+    lifetime of the server, so each client command costs only one MSP
+    request/response instead of a full serial reconnect and handshake.
 
-    # The 'with' statement ensures the connection is properly closed
-    # after the block is exited, even if errors occur.
-    try:
-        with MSPy(device=SERIAL_PORT, loglevel="WARNING", baudrate=115200) as board:
-            if board is None:
-                print("Failed to connect to the flight controller.")
-                return
-
-            print("Successfully connected to the flight controller.")
-            print("Requesting barometer data... Press Ctrl+C to stop.")
-
-            while True:
-                # 1. Choose the command to send
-                # For altitude data from the barometer, we use 'MSP_ALTITUDE'
-                msp_command = "MSP_ALTITUDE"
-
-                # 2. Send the command to the flight controller
-                # The 'send_RAW_msg' method sends the command and waits for a response.
-                # It returns the data if successful, otherwise it might return None or raise an exception.
-                if board.send_RAW_msg(MSPy.MSPCodes[msp_command], data=[]):
-
-                    # 3. Get the data from the board's attribute
-                    # The YAMSPy library stores the received data in an attribute
-                    # with the same name as the command (in lowercase).
-                    data_handler = board.receive_msg()
-                    board.process_recv_data(data_handler)
-                    altitude_data = board.SENSOR_DATA["altitude"]
-
-                    # 4. Process and display the data
-                    # The 'alt' key contains the altitude in centimeters.
-                    # The 'vario' key contains the vertical speed in cm/s.
-                    if altitude_data:
-                        return f"Altitude: {altitude_data:.2f} meters"
-                    else:
-                        return "No altitude data received in this cycle."
-
-                else:
-                    return f"Failed to send {msp_command} command."
-
-                # Wait for a short period before sending the next request
-                time.sleep(0.1)
+    heartbeat_fd is a timerfd firing at HEARTBEAT_RATE_HZ; register it with the
+    event loop and send_heartbeat() re-sends RC_BUF on every expiration to
+    prevent the FC failsafe. arm()/disarm() only change the channel values.
+    """
 
-    except KeyboardInterrupt:
-        print("\nStopping data requests. Exiting.")
-    except Exception as e:
-        print(f"\nAn error occurred: {e}")
+    def __init__(self, device=SERIAL_PORT, baudrate=115200):
+        self.device = device
+        self.baudrate = baudrate
+        self.board = None
+        self.heartbeat_fd = None
+        self._msp = None
+
+    def __enter__(self):
+        logger.info("Connecting to FC on %s...", self.device)
+        self._msp = MSPy(device=self.device, loglevel="WARNING", baudrate=self.baudrate)
+        # flock the port so a second FC owner (e.g. another server instance) fails
+        # here instead of interleaving its RC frames and MSP replies with ours
+        self._msp.conn.exclusive = True
+        board = self._msp.__enter__()
+        if board == 1:
+            raise RuntimeError(
+                f"Failed to connect to the flight controller on {self.device}."
+            )
+        self.board = board
+        logger.info("Successfully connected to the flight controller.")
+
+        self.heartbeat_fd = create_timerfd(1 / HEARTBEAT_RATE_HZ)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self.heartbeat_fd is not None:
+            os.close(self.heartbeat_fd)
+            self.heartbeat_fd = None
+        if self._msp is not None:
+            self._msp.__exit__(exc_type, exc_value, traceback)
+        self.board = None
+
+    def send_heartbeat(self, fd):
+        """
+        Sends the RC channels on each timer expiration. It's crucial to send
+        messages continuously to prevent FC failsafe.
+        """
+        try:
+            # Acknowledge the expiration(s); missed ticks are collapsed into one send
+            os.read(fd, 8)
+        except BlockingIOError:
+            return
+        try:
+            send_rc_frame(self.board)
+        except Exception as e:
+            logger.error("Error sending RC data: %s", e)
+
+    def read_altitude(self):
+        """
+        Retrieves barometer/altitude data from the flight controller.
+        """
+        msp_command = "MSP_ALTITUDE"
+        try:
+            send_frame(self.board, MSP_ALTITUDE_FRAME)
+        except OSError:
+            return f"Failed to send {msp_command} command."
+
+        data_handler = self.board.receive_msg()
+        self.board.process_recv_data(data_handler)
+        altitude_data = self.board.SENSOR_DATA["altitude"]
+
+        if altitude_data:
+            return f"Altitude: {altitude_data:.2f} meters"
+        else:
+            return "No altitude data received in this cycle."
+
+    def arm(self):
+        RC_BUF[CH_IDX["aux1"]] = 1800
+        RC_BUF[CH_IDX["aux3"]] = 1800
+        return "Arming..."
+
+    def disarm(self):
+        RC_BUF[CH_IDX["aux3"]] = 1000
+        RC_BUF[CH_IDX["aux1"]] = 1000
+        return "Disarming..."
+
+
+class FCProxy:
+    """
+    Stands in for FCSession in workers that don't own the serial port,
+    forwarding flight controller commands to worker 0 over the socketpair link
+    created for this worker before it was forked.
+    """
 
+    def __init__(self, link):
+        self._sock = link
+        # Don't let a stuck worker 0 hang this worker's event loop
+        self._sock.settimeout(FC_PROXY_TIMEOUT)
 
-def arm():
-    try:
-        with MSPy(device=SERIAL_PORT, loglevel="WARNING", baudrate=115200) as board:
-            if board is None:
-                print("Failed to connect to the flight controller.")
-                return
-
-            print("Successfully connected to the flight controller.")
-            print("Arming... Press Ctrl+C to stop.")
-
-            while True:
-                try:
-                    rc_channels["aux1"] = 1800
-                    rc_channels["aux3"] = 1800
-                    board.fast_msp_rc_cmd(
-                        [rc_channels[channel] for channel in rc_channel_order]
-                    )
-                except Exception as e:
-                    print(f"Error sending RC data: {e}")
-                    break
+    def _request(self, opcode):
+        if self._sock is None:
+            return "Error: Flight controller is unavailable."
+        try:
+            self._sock.sendall(bytes((opcode,)))
+            (length,) = RESPONSE_HEADER.unpack(
+                recv_exact(self._sock, RESPONSE_HEADER.size)
+            )
+            return recv_exact(self._sock, length).decode("utf-8")
 
-    except KeyboardInterrupt:
-        print("\nStopping data requests. Exiting.")
-    except Exception as e:
-        print(f"\nAn error occurred: {e}")
+        except OSError as e:
+            # A late reply would desynchronize the link, so it is not reused
+            logger.error("Flight controller worker is unavailable: %s", e)
+            self._sock.close()
+            self._sock = None
+            return "Error: Flight controller is unavailable."
 
+    def read_altitude(self):
+        return self._request(OP_BAR)
 
-def disarm():
-    try:
-        with MSPy(device=SERIAL_PORT, loglevel="WARNING", baudrate=115200) as board:
-            if board is None:
-                print("Failed to connect to the flight controller.")
-                return
-
-            print("Successfully connected to the flight controller.")
-            print("Disarming... Press Ctrl+C to stop.")
-
-            while True:
-                try:
-                    rc_channels["aux3"] = 1000
-                    rc_channels["aux1"] = 1000
-                    board.fast_msp_rc_cmd(
-                        [rc_channels[channel] for channel in rc_channel_order]
-                    )
-                    # It's crucial to send messages continuously to prevent FC failsafe
-                    time.sleep(0.05)
-                except Exception as e:
-                    print(f"Error sending RC data: {e}")
-                    break
+    def arm(self):
+        return self._request(OP_ARM)
+
+    def disarm(self):
+        return self._request(OP_DISARM)
+
+
+def get_server_time():
+    now = datetime.now()
+    return f"Server time is: {now.strftime('%Y-%m-%d %H:%M:%S')}"
 
-    except KeyboardInterrupt:
-        print("\nStopping data requests. Exiting.")
-    except Exception as e:
-        print(f"\nAn error occurred: {e}")
 
+def build_commands(session):
+    """
+    Maps each opcode to the function producing its response.
+    """
+    return {
+        OP_PING: lambda: "pong",
+        OP_STATUS: lambda: "Server is running and ready for commands.",
+        OP_BAR: session.read_altitude,
+        OP_ARM: session.arm,
+        OP_DISARM: session.disarm,
+        OP_TIME: get_server_time,
+    }
+
+
+def recv_exact(sock, n):
+    """
+    Reads exactly n bytes from a blocking socket.
+    """
+    buf = bytearray()
+    while len(buf) < n:
+        chunk = sock.recv(n - len(buf))
+        if not chunk:
+            raise ConnectionError("Connection closed mid-message.")
+        buf += chunk
+    return bytes(buf)
+
+
+def encode_response(response):
+    payload = response.encode("utf-8")
+    return RESPONSE_HEADER.pack(len(payload)) + payload
 
-def handle_client_connection(client_socket, client_address):
+
+def accept_client(sel, commands, server_socket):
     """
-    Manages the communication with a single connected client.
+    Accepts a pending connection and registers it with the selector.
+    """
+    client_socket, client_address = server_socket.accept()
+    logger.info("Accepted connection from %s", client_address)
+    register_client(sel, commands, client_socket, client_address)
+
+
+def register_client(sel, commands, client_socket, client_address):
+    """
+    Registers a connected socket with the selector so its commands get answered.
+    """
+    # Receive buffer reused for every read on this connection
+    recv_view = memoryview(bytearray(RECV_BUFFER_SIZE))
+    client_socket.setblocking(False)
+    if client_socket.family != socket.AF_UNIX:
+        # Commands are tiny request/response messages; don't let Nagle hold them back
+        client_socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        # Bound the unsent backlog instead of sizing SO_SNDBUF/SO_RCVBUF: setting
+        # those statically turns off the kernel's TCP buffer autotuning, which hurts
+        # throughput on the WiFi link. Leave the buffers at their autotuned defaults.
+        if sys.platform.startswith("linux"):
+            client_socket.setsockopt(
+                socket.IPPROTO_TCP, TCP_NOTSENT_LOWAT, NOTSENT_LOWAT_BYTES
+            )
+    sel.register(
+        client_socket,
+        selectors.EVENT_READ,
+        functools.partial(
+            handle_client_data, sel, commands, client_address, recv_view
+        ),
+    )
+
+
+def close_client(sel, client_socket, client_address):
+    logger.info("Closing connection with %s", client_address)
+    sel.unregister(client_socket)
+    client_socket.close()
+
+
+def handle_client_data(sel, commands, client_address, recv_view, client_socket):
+    """
+    Processes the commands from a connected client once it is readable.
     """
-    logging.info(f"Accepted connection from {client_address}")
     try:
-        while True:
-            # Wait to receive data from the client (up to 1024 bytes)
-            data = client_socket.recv(1024)
-            if not data:
-                # If no data is received, the client has closed the connection
-                logging.info(f"Client {client_address} disconnected.")
-                break
-
-            # Decode the received bytes into a string and remove whitespace
-            command = data.decode("utf-8").strip().lower()
-            logging.info(f"Received command: '{command}' from {client_address}")
-
-            response = ""
+        # Receive the available data from the client into the connection's buffer
+        n = client_socket.recv_into(recv_view)
+        if not n:
+            # If no data is received, the client has closed the connection
+            logger.info("Client %s disconnected.", client_address)
+            close_client(sel, client_socket, client_address)
+            return
+
+        # Quick ACK mode is not sticky on Linux, so re-enable it after every read
+        # to keep delayed ACKs from stalling the response
+        if hasattr(socket, "TCP_QUICKACK") and client_socket.family != socket.AF_UNIX:
+            client_socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_QUICKACK, 1)
+
+        # Every received byte is one opcode; answer all of them in a single write
+        responses = []
+        for opcode in recv_view[:n]:
+            logger.info("Received command: %r from %s", opcode, client_address)
+
             # --- Process the command ---
-            if command == "ping":
-                response = "pong"
-            elif command == "status":
-                response = "Server is running and ready for commands."
-            elif command == "bar":
-                response = get_barometer_reading()
-            elif command == "arm":
-                arm()
-            elif command == "disarm":
-                disarm()
-            elif command == "time":
-                now = datetime.now()
-                response = f"Server time is: {now.strftime('%Y-%m-%d %H:%M:%S')}"
+            handler = commands.get(opcode)
+            if handler is not None:
+                response = handler()
             else:
                 response = "Error: Unknown command."
+            responses.append(encode_response(response))
 
-            # Encode the response string into bytes and send it back to the client
-            client_socket.sendall(response.encode("utf-8"))
+        client_socket.sendall(b"".join(responses))
 
     except ConnectionResetError:
-        logging.warning(
-            f"Connection with {client_address} was forcibly closed by the client."
+        logger.warning(
+            "Connection with %s was forcibly closed by the client.", client_address
         )
+        close_client(sel, client_socket, client_address)
     except Exception as e:
-        logging.error(f"An error occurred with client {client_address}: {e}")
-    finally:
-        # Ensure the connection is closed when the loop is exited
-        logging.info(f"Closing connection with {client_address}")
-        client_socket.close()
+        logger.error("An error occurred with client %s: %s", client_address, e)
+        close_client(sel, client_socket, client_address)
 
 
-def main():
+def create_server_socket(workers):
     """
-    The main function to set up the server and listen for connections.
+    Creates this worker's listening TCP socket.
     """
     # Create a new socket object for TCP/IP communication
     # AF_INET specifies IPv4, SOCK_STREAM specifies TCP
@@ -205,39 +416,131 @@ def main():
     # This option allows the socket to be reused immediately after it's closed
     server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
 
-    try:
-        # Bind the socket to the host IP and port
-        server_socket.bind((HOST_IP, COMMAND_PORT))
+    # Every worker binds its own socket to the same port; the kernel spreads
+    # incoming connections across them. A single worker keeps the port to itself,
+    # so a second server instance fails to bind instead of sharing it.
+    if workers > 1:
+        server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
 
-        # Enable the server to accept connections, with a queue of up to 5
-        server_socket.listen(5)
-        logging.info(f"Server is listening on port {COMMAND_PORT}...")
+    return server_socket
 
-        # Main loop to continuously accept new connections
-        while True:
-            # Wait for a client to connect. This is a blocking call.
-            # It returns a new socket for the client and the client's address.
-            client_socket, client_address = server_socket.accept()
 
-            # For simplicity, this server handles one client at a time.
-            # For multiple simultaneous clients, you would typically start a new thread here.
-            # For example:
-            # import threading
-            # client_thread = threading.Thread(target=handle_client_connection, args=(client_socket, client_address))
-            # client_thread.start()
+def serve(worker_id, workers, stop_event, fc_links):
+    """
+    Runs one worker's event loop until stop_event is set.
+    Worker 0 owns the serial connection to the FC and answers FC commands arriving
+    on fc_links, one socketpair end per other worker. Every other worker forwards
+    FC commands to worker 0 over its single link in fc_links.
+    """
+    server_socket = create_server_socket(workers)
+
+    # Readiness notification for the listening socket and all clients (epoll on Linux)
+    sel = selectors.DefaultSelector()
 
-            # Handle the client connection directly in the main loop
-            handle_client_connection(client_socket, client_address)
+    try:
+        # Bind the socket to the host IP and port
+        server_socket.bind((HOST_IP, COMMAND_PORT))
 
+        with contextlib.ExitStack() as stack:
+            if worker_id == 0:
+                # Open the FC connection once; it stays up for the lifetime of the server
+                session = stack.enter_context(FCSession())
+                # The failsafe heartbeat runs on this same event loop
+                sel.register(
+                    session.heartbeat_fd, selectors.EVENT_READ, session.send_heartbeat
+                )
+                stack.callback(sel.unregister, session.heartbeat_fd)
+            else:
+                (link,) = fc_links
+                session = FCProxy(link)
+                stack.callback(link.close)
+            commands = build_commands(session)
+
+            if worker_id == 0:
+                for other_id, link in enumerate(fc_links, start=1):
+                    register_client(sel, commands, link, f"worker {other_id}")
+
+            # Enable the server to accept connections, with a queue of up to 5
+            server_socket.listen(5)
+            server_socket.setblocking(False)
+            logger.info(
+                "Worker %s is listening on port %s...", worker_id, COMMAND_PORT
+            )
+
+            # A single event loop serves the listening socket and every client,
+            # so one slow client no longer blocks the others.
+            sel.register(
+                server_socket,
+                selectors.EVENT_READ,
+                functools.partial(accept_client, sel, commands),
+            )
+
+            while not stop_event.is_set():
+                for key, _ in sel.select(timeout=SHUTDOWN_POLL_INTERVAL):
+                    callback = key.data
+                    callback(key.fileobj)
+
+    except RuntimeError as e:
+        logger.error(e)
     except socket.error as e:
-        logging.error(f"Socket error: {e}")
+        logger.error("Socket error: %s", e)
     except KeyboardInterrupt:
-        logging.info("Server is shutting down due to user interrupt (Ctrl+C).")
+        logger.info("Server is shutting down due to user interrupt (Ctrl+C).")
     finally:
-        # Ensure the server socket is closed when the program ends
-        logging.info("Closing server socket.")
+        # Ensure the client and server sockets are closed when the program ends
+        for key in list(sel.get_map().values()):
+            if key.fileobj is not server_socket:
+                key.fileobj.close()
+        sel.close()
+        logger.info("Closing server socket.")
         server_socket.close()
 
 
+def main():
+    """
+    The main function to set up the server and listen for connections.
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        choices=range(1, MAX_WORKERS + 1),
+        metavar=f"1..{MAX_WORKERS}",
+        help="number of worker processes accepting connections (default: 1)",
+    )
+    args = parser.parse_args()
+
+    # Set by the parent to stop every worker
+    stop_event = multiprocessing.Event()
+
+    children = []
+    # Worker 0's ends of the links to the other workers, created before forking
+    # so no filesystem path is involved
+    fc_links = []
+    for worker_id in range(1, args.workers):
+        parent_link, child_link = socket.socketpair()
+        pid = os.fork()
+        if pid == 0:
+            # Ctrl+C is handled by the parent, which then stops the workers
+            signal.signal(signal.SIGINT, signal.SIG_IGN)
+            try:
+                for link in fc_links + [parent_link]:
+                    link.close()
+                serve(worker_id, args.workers, stop_event, [child_link])
+            finally:
+                os._exit(0)
+        child_link.close()
+        fc_links.append(parent_link)
+        children.append(pid)
+
+    try:
+        serve(0, args.workers, stop_event, fc_links)
+    finally:
+        stop_event.set()
+        for pid in children:
+            os.waitpid(pid, 0)
+
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,70 @@
+import unittest
+
+import numpy as np
+
+from flight_controller import FlightController
+
+# Yaw positions on a 1/64 turn grid, exactly representable so every error below is exact
+YAW_GRID = np.arange(64) / 64
+
+
+def original_yaw_setpoint(desired_yaw, current_yaw):
+    """The yaw wraparound as written before the branchless version."""
+    clockwise_yaw_distance = abs(desired_yaw - current_yaw)
+    counterclockwise_yaw_distance = abs((desired_yaw - 1) - current_yaw)
+    if clockwise_yaw_distance < counterclockwise_yaw_distance:
+        return desired_yaw
+    return desired_yaw - 1
+
+
+class YawWrapTest(unittest.TestCase):
+    def setUp(self):
+        # Proportional-only yaw with unit gain, so the yaw RC command is
+        # 1500 + 500 * yaw error and nothing saturates within half a turn
+        self.fc = FlightController()
+        self.fc.Kp = np.array([0.0, 0.0, 0.0, 1.0])
+        self.fc.Ki = np.zeros(4)
+        self.fc.Kd = np.zeros(4)
+
+    def yaw_rc(self, desired_yaw, current_yaw):
+        self.fc.reset()
+        action = np.array([0.0, 0.0, 0.0, desired_yaw])
+        state_goal = np.array([0.0, 0.0, 0.0, current_yaw, 0.0])
+        return int(self.fc.compute_rc_commands(action, state_goal, 0.02)[3])
+
+    def test_matches_original_within_half_turn(self):
+        for desired_yaw in YAW_GRID:
+            for current_yaw in YAW_GRID:
+                yaw_diff = desired_yaw - current_yaw
+                if not -0.5 <= yaw_diff < 0.5:
+                    continue
+                with self.subTest(desired_yaw=desired_yaw, current_yaw=current_yaw):
+                    setpoint = original_yaw_setpoint(desired_yaw, current_yaw)
+                    expected = int(1500 + 500 * (setpoint - current_yaw))
+                    self.assertEqual(self.yaw_rc(desired_yaw, current_yaw), expected)
+
+    def test_half_turn_tie(self):
+        # Exactly half a turn apart either way, both versions steer by -0.5
+        self.assertEqual(self.yaw_rc(0.75, 0.25), 1250)
+        self.assertEqual(self.yaw_rc(0.25, 0.75), 1250)
+        self.assertEqual(original_yaw_setpoint(0.75, 0.25) - 0.25, -0.5)
+        self.assertEqual(original_yaw_setpoint(0.25, 0.75) - 0.75, -0.5)
+
+    def test_takes_shorter_path_below_minus_half_turn(self):
+        # Intended change: the original steered -0.8 of a turn the long way
+        # round here, the branchless version steers +0.2 across the wraparound
+        self.assertEqual(original_yaw_setpoint(0.1, 0.9) - 0.9, -0.8)
+        self.assertEqual(self.yaw_rc(0.1, 0.9), 1600)
+
+        for desired_yaw in YAW_GRID:
+            for current_yaw in YAW_GRID:
+                yaw_diff = desired_yaw - current_yaw
+                if yaw_diff >= -0.5:
+                    continue
+                with self.subTest(desired_yaw=desired_yaw, current_yaw=current_yaw):
+                    expected = int(1500 + 500 * (yaw_diff + 1))
+                    self.assertEqual(self.yaw_rc(desired_yaw, current_yaw), expected)
+
+
+if __name__ == "__main__":
+    unittest.main()